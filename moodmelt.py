@@ -1,9 +1,19 @@
 import streamlit as st
 import pandas as pd
+import numpy as np
 import plotly.express as px
 import plotly.graph_objects as go
 import requests
+import httpx
+import asyncio
 import io
+import json
+import os
+import re
+import tempfile
+import hashlib
+import threading
+import time
 
 # Konfigurasi halaman Streamlit
 st.set_page_config(
@@ -15,67 +25,458 @@ st.set_page_config(
 # Colors for charts (Fruity theme: Tomato, Gold, LimeGreen, OrangeRed, Goldenrod, ForestGreen)
 FRUITY_COLORS = ['#FF6347', '#FFD700', '#32CD32', '#FF4500', '#DAA520', '#228B22']
 
+# Batas jumlah titik grafik tren sebelum diringkas per minggu/bulan, dan sebelum marker dimatikan
+TREND_MAX_POINTS = 500
+TREND_MARKER_MAX_POINTS = 200
+
+# Kolom yang dipakai sebagai filter di sidebar
+FILTER_COLUMNS = ('Platform', 'Sentiment', 'Media Type', 'Location')
+
+# Direktori cache Parquet untuk hasil parse CSV; naikkan versi jika logika parse_csv berubah.
+# Ditambatkan ke folder aplikasi (bukan direktori kerja) agar pembersihan tidak menyentuh file milik alat lain.
+PARQUET_CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.cache', 'moodmelt')
+PARQUET_CACHE_TMP_PREFIX = 'moodmelt-'
+# Hanya nama file yang dibuat aplikasi ini yang boleh dihapus saat pembersihan
+PARQUET_CACHE_FILE_RE = re.compile(r'^[0-9a-f]{40}-v(\d+)\.parquet$')
+PARQUET_CACHE_TMP_RE = re.compile(r'^' + re.escape(PARQUET_CACHE_TMP_PREFIX) + r'[A-Za-z0-9_]+\.tmp$')
+PARQUET_CACHE_VERSION = 4
+PARQUET_CACHE_MAX_FILES = 20
+
+# Jumlah maksimum mask filter yang disimpan di cache (tiap entri berukuran 1 byte per baris)
+APPLY_FILTERS_MAX_ENTRIES = 16
+
+# Batas waktu (detik) untuk permintaan ke Gemini API agar worker Streamlit tidak menggantung
+GEMINI_TIMEOUT = 30
+
+# Lama (detik) ringkasan Gemini disimpan di cache
+SUMMARY_CACHE_TTL = 3600
+
+# Sudut pandang untuk ringkasan multi-perspektif: {nama tab: fokus yang ditambahkan ke prompt}
+SUMMARY_PERSPECTIVES = {
+    "Keseluruhan": None,
+    "Platform": "perbandingan kinerja antar platform dan alokasi konten per platform",
+    "Sentimen": "pengelolaan sentimen audiens, termasuk cara menanggapi sentimen negatif",
+    "Lokasi": "penargetan geografis berdasarkan lokasi dengan keterlibatan tertinggi",
+}
+
+# Pilihan tier layanan Gemini: standar (latensi rendah) atau flex (harga lebih murah, antrean lebih lambat)
+GEMINI_SERVICE_TIERS = {
+    "Cepat (standar)": None,
+    "Hemat (flex)": "flex",
+}
+
 # --- Fungsi Bantuan ---
 
+def filter_options(df):
+    """
+    Daftar pilihan selectbox per kolom filter, diambil dari kategori yang sudah unik
+    sehingga tidak perlu unique() pada seluruh kolom setiap rerun.
+    """
+    return {
+        col: sorted(df[col].cat.categories.tolist())
+        for col in FILTER_COLUMNS
+        if col in df.columns
+    }
+
+
+def _write_parquet_cache(df, cache_path):
+    """
+    Menulis df ke file sementara di PARQUET_CACHE_DIR lalu memindahkannya dengan os.replace,
+    sehingga worker lain tidak pernah membaca file Parquet yang setengah tertulis.
+    """
+    os.makedirs(PARQUET_CACHE_DIR, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=PARQUET_CACHE_DIR, prefix=PARQUET_CACHE_TMP_PREFIX, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            df.to_parquet(f, compression='zstd')
+        os.replace(tmp_path, cache_path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+def _prune_parquet_cache():
+    """
+    Menghapus file cache dari versi PARQUET_CACHE_VERSION lama dan file sementara yang tertinggal,
+    lalu menyisakan PARQUET_CACHE_MAX_FILES file terbaru (berdasarkan waktu akses terakhir via mtime).
+    Hanya file dengan pola nama buatan aplikasi ini yang disentuh.
+    """
+    now = time.time()
+    current = []
+    for entry in os.scandir(PARQUET_CACHE_DIR):
+        try:
+            cache_match = PARQUET_CACHE_FILE_RE.match(entry.name)
+            if cache_match:
+                if int(cache_match.group(1)) == PARQUET_CACHE_VERSION:
+                    current.append((entry.stat().st_mtime, entry.path))
+                else:
+                    os.remove(entry.path)
+            elif PARQUET_CACHE_TMP_RE.match(entry.name) and now - entry.stat().st_mtime > 3600:
+                # Sisa penulisan worker yang berhenti di tengah jalan
+                os.remove(entry.path)
+        except OSError:
+            # File sudah dihapus atau diganti worker lain
+            pass
+
+    current.sort(reverse=True)
+    for _, path in current[PARQUET_CACHE_MAX_FILES:]:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
 @st.cache_data
 def parse_csv(uploaded_file):
     """
     Membaca dan membersihkan data dari file CSV yang diunggah.
     Mengonversi kolom 'Date' ke datetime dan mengisi 'Engagements' yang kosong.
+    Kolom filter (Platform, Sentiment, Media Type, Location) dikonversi ke tipe 'category'.
+    Hasilnya disimpan sebagai Parquet di disk agar sesi atau worker baru tidak perlu mem-parse ulang.
+    Mengembalikan tuple (df, pilihan filter per kolom, hash SHA-1 file).
     """
     if uploaded_file is None:
-        return pd.DataFrame()
+        return pd.DataFrame(), {}, None
+
+    # Byte file diambil sekali dan dipakai untuk hash maupun parse
+    raw_bytes = uploaded_file.getvalue()
+    file_key = hashlib.sha1(raw_bytes).hexdigest()
+    cache_path = os.path.join(PARQUET_CACHE_DIR, f"{file_key}-v{PARQUET_CACHE_VERSION}.parquet")
+    if os.path.exists(cache_path):
+        try:
+            df = pd.read_parquet(cache_path)
+        except Exception:
+            # File cache rusak atau tidak terbaca; parse ulang dari CSV
+            df = None
+        if df is not None:
+            try:
+                # Memperbarui mtime agar file yang sering dipakai tidak ikut dipangkas
+                os.utime(cache_path)
+            except OSError:
+                # Mis. filesystem read-only; hasil cache tetap valid
+                pass
+            return df, filter_options(df), file_key
+
     try:
-        # Menggunakan io.StringIO untuk membaca file yang diunggah sebagai teks
-        string_data = io.StringIO(uploaded_file.getvalue().decode("utf-8"))
-        df = pd.read_csv(string_data)
+        # Menggunakan engine pyarrow (multithread) dan membaca byte mentah tanpa decode ke teks
+        df = pd.read_csv(io.BytesIO(raw_bytes), engine='pyarrow')
 
         # Membersihkan nama kolom dari spasi yang tidak diinginkan
         df.columns = df.columns.str.strip()
 
-        # Pembersihan data
+        # Pembersihan data (pyarrow sudah mengenali tanggal ISO; konversi ini menangani format lain dan nilai tidak valid)
         if 'Date' in df.columns:
             df['Date'] = pd.to_datetime(df['Date'], errors='coerce')
         if 'Engagements' in df.columns:
-            df['Engagements'] = pd.to_numeric(df['Engagements'], errors='coerce').fillna(0).astype(int)
+            # int32 cukup untuk jumlah keterlibatan dan memperkecil memori; nilai di luar rentang int32
+            # dipotong ke batasnya agar tidak wrap-around. Tipe hasil penjumlahan ditentukan pandas
+            # (saat ini dinaikkan ke int64 untuk groupby/resample), bukan dijamin oleh kode ini.
+            engagements = pd.to_numeric(df['Engagements'], errors='coerce').fillna(0)
+            int32_info = np.iinfo(np.int32)
+            df['Engagements'] = engagements.clip(int32_info.min, int32_info.max).astype('int32')
 
         # Menghapus baris dengan tanggal atau keterlibatan yang tidak valid
         df.dropna(subset=['Date', 'Engagements'], inplace=True)
-        return df
+
+        # Tanggal harian (tanpa jam) dihitung sekali untuk grafik tren
+        df['DateDay'] = df['Date'].values.astype('datetime64[D]')
+
+        # Kolom filter berkardinalitas rendah disimpan sebagai 'category' agar groupby dan mask memakai kode integer
+        for col in FILTER_COLUMNS:
+            if col in df.columns:
+                df[col] = df[col].astype('category')
     except Exception as e:
         st.error(f"Error saat memproses file CSV: {e}")
-        return pd.DataFrame()
+        return pd.DataFrame(), {}, file_key
 
+    try:
+        _write_parquet_cache(df, cache_path)
+        _prune_parquet_cache()
+    except Exception:
+        # Cache disk hanya optimasi; kegagalan menulis tidak boleh menghentikan dasbor
+        pass
+    return df, filter_options(df), file_key
 
-def generate_campaign_summary(api_key, filtered_df):
+
+@st.cache_data(show_spinner=False, max_entries=APPLY_FILTERS_MAX_ENTRIES)
+def filter_mask(file_hash, _df, platform, sentiment, media_type, location, start_date, end_date):
     """
-    Menghasilkan ringkasan kampanye menggunakan Gemini API.
+    Menghitung mask boolean dari filter sidebar.
+    Di-cache berdasarkan hash file dan nilai filter; yang disimpan hanya mask (bukan salinan DataFrame)
+    agar entri cache tetap kecil.
     """
-    if filtered_df.empty:
-        return "Data tidak cukup untuk membuat ringkasan."
+    # Menggabungkan semua kondisi ke dalam satu mask boolean agar DataFrame hanya diindeks sekali
+    mask = np.ones(len(_df), dtype=bool)
+    if platform != 'All':
+        mask &= _df['Platform'].values == platform
+    if sentiment != 'All':
+        mask &= _df['Sentiment'].values == sentiment
+    if 'Media Type' in _df.columns and media_type != 'All':
+        mask &= _df['Media Type'].values == media_type
+    if location != 'All':
+        mask &= _df['Location'].values == location
+
+    # Filter berdasarkan rentang tanggal
+    if start_date is not None and end_date is not None:
+        dates = _df['Date'].values.astype('datetime64[ns]')
+        mask &= (dates >= np.datetime64(start_date)) & (dates <= np.datetime64(end_date))
+
+    return mask
+
+
+def apply_filters(file_hash, df, platform, sentiment, media_type, location, start_date, end_date):
+    """
+    Menerapkan filter sidebar ke DataFrame memakai mask yang di-cache.
+    Jika tidak ada baris yang tersaring, DataFrame asli dikembalikan tanpa salinan;
+    kode di bawah hanya membaca filtered_df sehingga aliasing aman.
+    """
+    mask = filter_mask(file_hash, df, platform, sentiment, media_type, location, start_date, end_date)
+    if mask.all():
+        return df
+    return df.loc[mask]
+
+
+def top_categories(categories, engagements, k):
+    """
+    Menjumlahkan keterlibatan per kategori dengan np.bincount pada kode kategori,
+    lalu memilih k teratas dengan np.argpartition tanpa groupby atau pengurutan penuh.
+    Mengembalikan Series (indeks nama kategori) terurut menurun; hanya kategori yang muncul di data.
+    """
+    codes = categories.cat.codes.values
+    weights = engagements.values
+    valid = codes >= 0
+    n_categories = len(categories.cat.categories)
+    sums = np.bincount(codes[valid], weights=weights[valid], minlength=n_categories)
+    observed = np.flatnonzero(np.bincount(codes[valid], minlength=n_categories))
+
+    observed_sums = sums[observed]
+    if len(observed_sums) > k:
+        top = np.argpartition(observed_sums, -k)[-k:]
+    else:
+        top = np.arange(len(observed_sums))
+    top = top[np.argsort(-observed_sums[top], kind='stable')]
+    return pd.Series(
+        observed_sums[top].astype('int64'),
+        index=categories.cat.categories[observed[top]],
+        name=engagements.name
+    )
+
+
+@st.cache_data(show_spinner=False)
+def compute_aggs(file_hash, filter_key, _filtered_df):
+    """
+    Menghitung agregasi untuk grafik dasbor.
+    Mengembalikan DataFrame agregat yang kecil (bukan figur Plotly) agar entri cache tetap ringan.
+    """
+    sentiment_counts = _filtered_df['Sentiment'].value_counts()
+    sentiment_data = sentiment_counts[sentiment_counts > 0].reset_index()
+    sentiment_data.columns = ['Sentiment', 'count']
+
+    platform_data = _filtered_df.groupby('Platform', observed=True, sort=False)['Engagements'].sum().sort_values(ascending=False).reset_index()
+
+    media_type_data = None
+    if 'Media Type' in _filtered_df.columns:
+        media_type_counts = _filtered_df['Media Type'].value_counts()
+        media_type_data = media_type_counts[media_type_counts > 0].reset_index()
+        media_type_data.columns = ['Media Type', 'count']
+
+    location_data = top_categories(_filtered_df['Location'], _filtered_df['Engagements'], 5).sort_values()
+    location_data = location_data.rename_axis('Location').reset_index()
+
+    daily_trend = _filtered_df.groupby('DateDay')['Engagements'].sum().reset_index()
+    daily_trend.columns = ['Date', 'Engagements']
+
+    # Seri harian yang panjang diringkas per minggu, bulan, kuartal, lalu tahun agar payload grafik tetap kecil
+    engagement_trend_data = daily_trend
+    for freq in ('W', 'MS', 'QS', 'YS'):
+        if len(engagement_trend_data) <= TREND_MAX_POINTS:
+            break
+        engagement_trend_data = daily_trend.set_index('Date').resample(freq)['Engagements'].sum().reset_index()
+
+    # Resample mengisi nol untuk setiap periode kosong, jadi batas belum tentu terpenuhi;
+    # sebagai jaring pengaman, baris berurutan digabung per kelompok berukuran tetap
+    if len(engagement_trend_data) > TREND_MAX_POINTS:
+        group_size = -(-len(engagement_trend_data) // TREND_MAX_POINTS)
+        groups = np.arange(len(engagement_trend_data)) // group_size
+        engagement_trend_data = engagement_trend_data.groupby(groups).agg(
+            Date=('Date', 'first'),
+            Engagements=('Engagements', 'sum')
+        )
+
+    return {
+        'sentiment': sentiment_data,
+        'platform': platform_data,
+        'media_type': media_type_data,
+        'location': location_data,
+        'trend': engagement_trend_data,
+    }
+
+
+@st.cache_data(show_spinner=False)
+def sentiment_figure(sentiment_data):
+    """
+    Membuat grafik pai sentimen dari tabel agregat.
+    Figur di-cache sebagai dict sehingga rerun tidak membangun ulang trace Plotly.
+    """
+    fig_sentiment = px.pie(
+        sentiment_data,
+        names='Sentiment',
+        values='count',
+        color_discrete_sequence=FRUITY_COLORS,
+        hole=0.3
+    )
+    fig_sentiment.update_layout(legend_title_text='Sentimen')
+    return fig_sentiment.to_dict()
+
+
+@st.cache_data(show_spinner=False)
+def platform_figure(platform_data):
+    """
+    Membuat grafik batang keterlibatan per platform dari tabel agregat.
+    """
+    fig_platform = px.bar(
+        platform_data,
+        x='Platform',
+        y='Engagements',
+        color='Platform',
+        color_discrete_sequence=FRUITY_COLORS,
+        text_auto=True
+    )
+    fig_platform.update_layout(showlegend=False)
+    return fig_platform.to_dict()
+
+
+@st.cache_data(show_spinner=False)
+def media_type_figure(media_type_data):
+    """
+    Membuat grafik pai jenis media dari tabel agregat.
+    """
+    fig_media_type = px.pie(
+        media_type_data,
+        names='Media Type',
+        values='count',
+        color_discrete_sequence=FRUITY_COLORS,
+        hole=0.3
+    )
+    fig_media_type.update_layout(legend_title_text='Jenis Media')
+    return fig_media_type.to_dict()
+
+
+@st.cache_data(show_spinner=False)
+def location_figure(location_data):
+    """
+    Membuat grafik batang horizontal 5 lokasi teratas dari tabel agregat.
+    """
+    fig_location = px.bar(
+        location_data,
+        y='Location',
+        x='Engagements',
+        orientation='h',
+        color='Location',
+        color_discrete_sequence=FRUITY_COLORS,
+        text='Engagements'
+    )
+    fig_location.update_layout(showlegend=False, yaxis={'categoryorder':'total ascending'})
+    return fig_location.to_dict()
+
+
+@st.cache_data(show_spinner=False)
+def trend_figure(engagement_trend_data):
+    """
+    Membuat grafik garis tren keterlibatan dari tabel agregat.
+    Penanda titik hanya ditampilkan untuk seri pendek agar Plotly tidak menggambar ribuan marker.
+    """
+    fig_trend = px.line(
+        engagement_trend_data,
+        x='Date',
+        y='Engagements',
+        markers=len(engagement_trend_data) <= TREND_MARKER_MAX_POINTS
+    )
+    fig_trend.update_traces(line=dict(color='#FF6347', width=3))
+    return fig_trend.to_dict()
+
+
+@st.cache_resource
+def _gemini_session():
+    """
+    Session HTTP bersama untuk Gemini API agar koneksi TLS dipakai ulang antar klik (keep-alive).
+    """
+    session = requests.Session()
+    session.headers['Content-Type'] = 'application/json'
+    adapter = requests.adapters.HTTPAdapter(pool_connections=4, pool_maxsize=4)
+    session.mount('https://', adapter)
+    return session
 
+
+class GeminiResponseError(Exception):
+    """Respons Gemini API tidak memiliki teks ringkasan yang diharapkan."""
+
+
+def _compute_features(filtered_df):
+    """
+    Menghitung fitur agregat untuk prompt ringkasan kampanye.
+    Mengembalikan tuple kecil yang juga dipakai sebagai kunci cache respons Gemini.
+    """
     # Agregasi data untuk prompt
     dominant_sentiment = filtered_df['Sentiment'].mode()[0] if not filtered_df['Sentiment'].empty else 'N/A'
-    platform_engagement = filtered_df.groupby('Platform')['Engagements'].sum().sort_values(ascending=False)
+    platform_engagement = top_categories(filtered_df['Platform'], filtered_df['Engagements'], 1)
     top_platform = platform_engagement.index[0] if not platform_engagement.empty else 'N/A'
     top_platform_engagements = int(platform_engagement.iloc[0]) if not platform_engagement.empty else 0
 
-    engagement_trend = filtered_df.groupby('Date')['Engagements'].sum().sort_index()
+    # Tren dihitung dari total keterlibatan pada tanggal pertama dan terakhir saja
+    first_date = filtered_df['Date'].min()
+    last_date = filtered_df['Date'].max()
     overall_trend = 'stabil'
-    if len(engagement_trend) > 1:
-        if engagement_trend.iloc[-1] > engagement_trend.iloc[0] * 1.1:
+    if first_date != last_date:
+        first_engagements = filtered_df.loc[filtered_df['Date'] == first_date, 'Engagements'].sum()
+        last_engagements = filtered_df.loc[filtered_df['Date'] == last_date, 'Engagements'].sum()
+        if last_engagements > first_engagements * 1.1:
             overall_trend = 'meningkat'
-        elif engagement_trend.iloc[-1] < engagement_trend.iloc[0] * 0.9:
+        elif last_engagements < first_engagements * 0.9:
             overall_trend = 'menurun'
-    
-    start_date = engagement_trend.index.min().strftime('%Y-%m-%d') if not engagement_trend.empty else 'N/A'
-    end_date = engagement_trend.index.max().strftime('%Y-%m-%d') if not engagement_trend.empty else 'N/A'
+
+    start_date = first_date.strftime('%Y-%m-%d')
+    end_date = last_date.strftime('%Y-%m-%d')
 
     dominant_media_type = filtered_df['Media Type'].mode()[0] if 'Media Type' in filtered_df.columns and not filtered_df['Media Type'].empty else 'N/A'
-    location_engagement = filtered_df.groupby('Location')['Engagements'].sum().sort_values(ascending=False)
+    location_engagement = top_categories(filtered_df['Location'], filtered_df['Engagements'], 1)
     top_location = location_engagement.index[0] if not location_engagement.empty else 'N/A'
     top_location_engagements = int(location_engagement.iloc[0]) if not location_engagement.empty else 0
 
+    return (
+        dominant_sentiment,
+        top_platform,
+        top_platform_engagements,
+        overall_trend,
+        start_date,
+        end_date,
+        dominant_media_type,
+        top_location,
+        top_location_engagements,
+    )
+
+
+@st.cache_resource
+def _summary_cache():
+    """
+    Cache ringkasan Gemini lintas sesi dalam bentuk ({kunci: (waktu_dibuat, teks)}, lock).
+    st.cache_data tidak bisa menyimpan hasil generator streaming, jadi teks disimpan di sini setelah stream selesai.
+    Dict ini dipakai bersama oleh thread semua sesi, sehingga setiap akses harus memegang lock.
+    """
+    return {}, threading.Lock()
+
+
+def _build_prompt(features, focus=None):
+    """
+    Menyusun prompt ringkasan kampanye dari tuple fitur agregat.
+    Jika focus diberikan, model diminta menekankan sudut pandang tersebut.
+    """
+    (dominant_sentiment, top_platform, top_platform_engagements, overall_trend, start_date, end_date,
+     dominant_media_type, top_location, top_location_engagements) = features
+
     prompt = f"""
     Berdasarkan data intelijen media dan wawasan berikut, berikan ringkasan strategi kampanye yang ringkas (tindakan dan rekomendasi utama).
     - Sentimen Dominan: {dominant_sentiment}.
@@ -86,30 +487,193 @@ def generate_campaign_summary(api_key, filtered_df):
     Sarankan 3-5 rekomendasi yang dapat ditindaklanjuti untuk mengoptimalkan kampanye media. Fokus pada langkah-langkah yang dapat ditindaklanjuti berdasarkan poin data ini.
     Format sebagai poin-poin.
     """
-    
-    api_url = f"https://generativelanguage.googleapis.com/v1beta/models/gemini-2.0-flash:generateContent?key={api_key}"
+    if focus:
+        prompt += f"Fokuskan ringkasan dan rekomendasi pada {focus}.\n"
+    return prompt
+
+
+def _gemini_payload(prompt, service_tier):
+    """
+    Menyusun body permintaan Gemini untuk satu prompt.
+    """
     payload = {
         "contents": [{
             "role": "user",
             "parts": [{"text": prompt}]
         }]
     }
-    
-    try:
-        response = requests.post(api_url, json=payload, headers={'Content-Type': 'application/json'})
+    if service_tier:
+        payload["serviceTier"] = service_tier
+    return payload
+
+
+def _summary_cache_key(api_key, features, service_tier, focus=None):
+    """
+    Kunci cache ringkasan; kunci API hanya disimpan dalam bentuk hash.
+    """
+    api_key_hash = hashlib.sha256(api_key.encode("utf-8")).hexdigest()
+    return (api_key_hash, features, service_tier, focus)
+
+
+def _get_cached_summary(cache, cache_key, now):
+    """
+    Mengambil ringkasan dari cache jika belum kedaluwarsa.
+    """
+    entries, lock = cache
+    with lock:
+        cached = entries.get(cache_key)
+    if cached and now - cached[0] < SUMMARY_CACHE_TTL:
+        return cached[1]
+    return None
+
+
+def _store_summary(cache, cache_key, text, now):
+    """
+    Menyimpan ringkasan yang berhasil dibuat; entri kedaluwarsa dibersihkan sekalian.
+    """
+    entries, lock = cache
+    with lock:
+        for key in [k for k, (created, _) in entries.items() if now - created >= SUMMARY_CACHE_TTL]:
+            del entries[key]
+        entries[cache_key] = (now, text)
+
+
+def _stream_gemini(prompt, service_tier, api_key):
+    """
+    Memanggil endpoint streamGenerateContent (SSE) dan menghasilkan potongan teks segera setelah diterima.
+    """
+    api_url = f"https://generativelanguage.googleapis.com/v1beta/models/gemini-2.0-flash:streamGenerateContent?alt=sse&key={api_key}"
+    payload = _gemini_payload(prompt, service_tier)
+
+    received_text = False
+    with _gemini_session().post(api_url, json=payload, timeout=GEMINI_TIMEOUT, stream=True) as response:
         response.raise_for_status() # Akan error jika status code bukan 2xx
-        result = response.json()
-        
-        if (result.get('candidates') and 
-            result['candidates'][0].get('content') and 
-            result['candidates'][0]['content'].get('parts')):
-            return result['candidates'][0]['content']['parts'][0]['text']
-        else:
-            return "Gagal membuat ringkasan. Respons API tidak terduga."
+        for line in response.iter_lines():
+            # Setiap event SSE berbentuk "data: {...json...}"
+            if not line.startswith(b'data:'):
+                continue
+            chunk = json.loads(line[len(b'data:'):])
+            candidates = chunk.get('candidates')
+            if (candidates and
+                candidates[0].get('content') and
+                candidates[0]['content'].get('parts')):
+                text = candidates[0]['content']['parts'][0].get('text')
+                if text:
+                    received_text = True
+                    yield text
+    if not received_text:
+        raise GeminiResponseError()
+
+
+def generate_campaign_summary(api_key, filtered_df, service_tier=None):
+    """
+    Menghasilkan ringkasan kampanye menggunakan Gemini API sebagai generator potongan teks untuk st.write_stream.
+    Ringkasan dengan fitur, tier, dan kunci API yang sama diambil dari cache selama SUMMARY_CACHE_TTL detik.
+    """
+    if filtered_df.empty:
+        yield "Data tidak cukup untuk membuat ringkasan."
+        return
+
+    features = _compute_features(filtered_df)
+    cache_key = _summary_cache_key(api_key, features, service_tier)
+    cache = _summary_cache()
+    now = time.time()
+
+    cached = _get_cached_summary(cache, cache_key, now)
+    if cached is not None:
+        yield cached
+        return
+
+    chunks = []
+    try:
+        for text in _stream_gemini(_build_prompt(features), service_tier, api_key):
+            chunks.append(text)
+            yield text
+    except GeminiResponseError:
+        yield "Gagal membuat ringkasan. Respons API tidak terduga."
+        return
     except requests.exceptions.RequestException as e:
-        return f"Error saat menghubungi API: {e}"
+        # Pemisah hanya diperlukan jika sebagian teks sudah tampil sebelum error
+        separator = "\n\n" if chunks else ""
+        yield f"{separator}Error saat menghubungi API: {e}"
+        return
     except Exception as e:
-        return f"Terjadi kesalahan: {e}"
+        separator = "\n\n" if chunks else ""
+        yield f"{separator}Terjadi kesalahan: {e}"
+        return
+
+    # Hanya ringkasan yang selesai tanpa error yang disimpan
+    _store_summary(cache, cache_key, "".join(chunks), now)
+
+
+async def _generate_one(client, api_url, payload):
+    """
+    Satu permintaan generateContent non-streaming melalui klien httpx asinkron.
+    """
+    response = await client.post(api_url, json=payload, timeout=GEMINI_TIMEOUT)
+    response.raise_for_status() # Akan error jika status code bukan 2xx
+    result = response.json()
+
+    if (result.get('candidates') and
+        result['candidates'][0].get('content') and
+        result['candidates'][0]['content'].get('parts')):
+        return result['candidates'][0]['content']['parts'][0]['text']
+    raise GeminiResponseError()
+
+
+async def _generate_all(api_key, payloads):
+    """
+    Mengirim semua payload secara bersamaan dengan asyncio.gather di atas satu koneksi HTTP/2.
+    Exception dikembalikan per item agar satu kegagalan tidak membatalkan ringkasan lainnya.
+    """
+    api_url = f"https://generativelanguage.googleapis.com/v1beta/models/gemini-2.0-flash:generateContent?key={api_key}"
+    async with httpx.AsyncClient(http2=True, headers={'Content-Type': 'application/json'}) as client:
+        return await asyncio.gather(
+            *[_generate_one(client, api_url, payload) for payload in payloads],
+            return_exceptions=True
+        )
+
+
+def generate_multi_perspective_summaries(api_key, filtered_df, service_tier=None):
+    """
+    Menghasilkan ringkasan untuk setiap sudut pandang di SUMMARY_PERSPECTIVES secara paralel.
+    Mengembalikan dict {nama sudut pandang: teks ringkasan atau pesan error}.
+    """
+    if filtered_df.empty:
+        return {name: "Data tidak cukup untuk membuat ringkasan." for name in SUMMARY_PERSPECTIVES}
+
+    features = _compute_features(filtered_df)
+    cache = _summary_cache()
+    now = time.time()
+
+    summaries = {}
+    pending = {}
+    for name, focus in SUMMARY_PERSPECTIVES.items():
+        cache_key = _summary_cache_key(api_key, features, service_tier, focus)
+        cached = _get_cached_summary(cache, cache_key, now)
+        if cached is not None:
+            summaries[name] = cached
+        else:
+            pending[name] = (cache_key, _gemini_payload(_build_prompt(features, focus), service_tier))
+
+    if pending:
+        try:
+            results = asyncio.run(_generate_all(api_key, [payload for _, payload in pending.values()]))
+        except Exception as e:
+            results = [e] * len(pending)
+
+        for (name, (cache_key, _)), result in zip(pending.items(), results):
+            if isinstance(result, GeminiResponseError):
+                summaries[name] = "Gagal membuat ringkasan. Respons API tidak terduga."
+            elif isinstance(result, httpx.HTTPError):
+                summaries[name] = f"Error saat menghubungi API: {result}"
+            elif isinstance(result, Exception):
+                summaries[name] = f"Terjadi kesalahan: {result}"
+            else:
+                summaries[name] = result
+                _store_summary(cache, cache_key, result, now)
+
+    return {name: summaries[name] for name in SUMMARY_PERSPECTIVES}
 
 
 # --- Tampilan UI ---
@@ -129,7 +693,7 @@ if uploaded_file is None:
     st.stop()
 
 # Memproses data
-df = parse_csv(uploaded_file)
+df, options, file_hash = parse_csv(uploaded_file)
 
 if df.empty:
     st.warning("File CSV yang diunggah kosong atau tidak dapat diproses. Silakan periksa format file Anda.")
@@ -141,19 +705,19 @@ st.sidebar.header("🥭 Filter Data")
 # Filter
 platform = st.sidebar.selectbox(
     "Pilih Platform",
-    ['All'] + sorted(df['Platform'].unique().tolist())
+    ['All'] + options['Platform']
 )
 sentiment = st.sidebar.selectbox(
     "Pilih Sentimen",
-    ['All'] + sorted(df['Sentiment'].unique().tolist())
+    ['All'] + options['Sentiment']
 )
 media_type = st.sidebar.selectbox(
     "Pilih Jenis Media",
-    ['All'] + sorted(df['Media Type'].unique().tolist()) if 'Media Type' in df.columns else ['All']
+    ['All'] + options['Media Type'] if 'Media Type' in options else ['All']
 )
 location = st.sidebar.selectbox(
     "Pilih Lokasi",
-    ['All'] + sorted(df['Location'].unique().tolist())
+    ['All'] + options['Location']
 )
 
 # Filter tanggal
@@ -168,39 +732,58 @@ date_range = st.sidebar.date_input(
 )
 
 # Menerapkan filter
-filtered_df = df.copy()
-if platform != 'All':
-    filtered_df = filtered_df[filtered_df['Platform'] == platform]
-if sentiment != 'All':
-    filtered_df = filtered_df[filtered_df['Sentiment'] == sentiment]
-if 'Media Type' in filtered_df.columns and media_type != 'All':
-    filtered_df = filtered_df[filtered_df['Media Type'] == media_type]
-if location != 'All':
-    filtered_df = filtered_df[filtered_df['Location'] == location]
-
-# Filter berdasarkan rentang tanggal
+start_date, end_date = None, None
 if len(date_range) == 2:
     start_date, end_date = pd.to_datetime(date_range[0]), pd.to_datetime(date_range[1])
-    filtered_df = filtered_df[(filtered_df['Date'] >= start_date) & (filtered_df['Date'] <= end_date)]
+
+filter_key = (platform, sentiment, media_type, location, start_date, end_date)
+filtered_df = apply_filters(file_hash, df, *filter_key)
 
 if filtered_df.empty:
     st.warning("Tidak ada data yang cocok dengan filter yang dipilih.")
     st.stop()
 
+aggs = compute_aggs(file_hash, filter_key, filtered_df)
+
 
 # --- Dasbor Utama ---
 
 # Ringkasan Strategi Kampanye (AI)
-st.subheader("🍒 Ringkasan Strategi Kampanye")
-gemini_api_key = st.text_input("Masukkan Kunci API Gemini Anda", type="password")
-
-if st.button("Buat Ringkasan Strategi"):
-    if gemini_api_key:
-        with st.spinner("Membuat ringkasan dengan Gemini..."):
-            summary = generate_campaign_summary(gemini_api_key, filtered_df)
-            st.markdown(summary)
-    else:
-        st.error("Silakan masukkan kunci API Gemini Anda untuk melanjutkan.")
+@st.fragment
+def summary_fragment(filtered_df):
+    """
+    Bagian ringkasan AI sebagai fragment: mengetik kunci API atau menekan tombol
+    hanya menjalankan ulang blok ini, bukan seluruh dasbor.
+    """
+    st.subheader("🍒 Ringkasan Strategi Kampanye")
+    gemini_api_key = st.text_input("Masukkan Kunci API Gemini Anda", type="password")
+    service_tier_label = st.radio(
+        "Mode Ringkasan",
+        list(GEMINI_SERVICE_TIERS),
+        horizontal=True,
+        help="Mode hemat memakai tier flex Gemini: biaya lebih rendah dengan waktu tunggu yang bisa lebih lama."
+    )
+
+    service_tier = GEMINI_SERVICE_TIERS[service_tier_label]
+
+    summary_col, multi_col = st.columns(2)
+    generate_single = summary_col.button("Buat Ringkasan Strategi")
+    generate_multi = multi_col.button("Ringkasan multi-perspektif")
+
+    if generate_single or generate_multi:
+        if not gemini_api_key:
+            st.error("Silakan masukkan kunci API Gemini Anda untuk melanjutkan.")
+        elif generate_single:
+            with st.spinner("Membuat ringkasan dengan Gemini..."):
+                st.write_stream(generate_campaign_summary(gemini_api_key, filtered_df, service_tier))
+        else:
+            with st.spinner("Membuat ringkasan multi-perspektif dengan Gemini..."):
+                summaries = generate_multi_perspective_summaries(gemini_api_key, filtered_df, service_tier)
+            for tab, summary in zip(st.tabs(list(summaries)), summaries.values()):
+                tab.markdown(summary)
+
+
+summary_fragment(filtered_df)
 
 # Layout kolom untuk grafik
 col1, col2 = st.columns(2)
@@ -208,78 +791,55 @@ col1, col2 = st.columns(2)
 with col1:
     # Analisis Sentimen
     st.subheader("🍓 Analisis Sentimen")
-    sentiment_data = filtered_df['Sentiment'].value_counts().reset_index()
-    sentiment_data.columns = ['Sentiment', 'count']
-    fig_sentiment = px.pie(
-        sentiment_data,
-        names='Sentiment',
-        values='count',
-        color_discrete_sequence=FRUITY_COLORS,
-        hole=0.3
-    )
-    fig_sentiment.update_layout(legend_title_text='Sentimen')
-    st.plotly_chart(fig_sentiment, use_container_width=True)
+    st.plotly_chart(go.Figure(sentiment_figure(aggs['sentiment'])), use_container_width=True)
 
+with col2:
     # Keterlibatan per Platform
     st.subheader("🍋 Keterlibatan per Platform")
-    platform_data = filtered_df.groupby('Platform')['Engagements'].sum().sort_values(ascending=False).reset_index()
-    fig_platform = px.bar(
-        platform_data,
-        x='Platform',
-        y='Engagements',
-        color='Platform',
-        color_discrete_sequence=FRUITY_COLORS,
-        text_auto=True
-    )
-    fig_platform.update_layout(showlegend=False)
-    st.plotly_chart(fig_platform, use_container_width=True)
+    st.plotly_chart(go.Figure(platform_figure(aggs['platform'])), use_container_width=True)
 
-with col2:
-    # Kombinasi Jenis Media
-    st.subheader("🥝 Kombinasi Jenis Media")
-    if 'Media Type' in filtered_df.columns:
-        media_type_data = filtered_df['Media Type'].value_counts().reset_index()
-        media_type_data.columns = ['Media Type', 'count']
-        fig_media_type = px.pie(
-            media_type_data,
-            names='Media Type',
-            values='count',
-            color_discrete_sequence=FRUITY_COLORS,
-            hole=0.3
-        )
-        fig_media_type.update_layout(legend_title_text='Jenis Media')
-        st.plotly_chart(fig_media_type, use_container_width=True)
-    else:
-        st.info("Kolom 'Media Type' tidak ditemukan di data.")
-        
-    # 5 Lokasi Teratas
-    st.subheader("🍍 5 Lokasi Teratas")
-    location_data = filtered_df.groupby('Location')['Engagements'].sum().nlargest(5).sort_values().reset_index()
-    fig_location = px.bar(
-        location_data,
-        y='Location',
-        x='Engagements',
-        orientation='h',
-        color='Location',
-        color_discrete_sequence=FRUITY_COLORS,
-        text='Engagements'
-    )
-    fig_location.update_layout(showlegend=False, yaxis={'categoryorder':'total ascending'})
-    st.plotly_chart(fig_location, use_container_width=True)
 
+# Grafik lanjutan
+@st.fragment
+def advanced_charts_fragment(aggs):
+    """
+    Grafik jenis media, lokasi teratas, dan tren hanya dibuat dan dikirim ke browser setelah diaktifkan.
+    Isi st.expander tetap dijalankan walau tertutup, jadi toggle dipakai agar pekerjaan benar-benar dilewati.
+    """
+    if not st.toggle("Tampilkan grafik lanjutan", value=False):
+        return
 
-# Tren Keterlibatan Seiring Waktu
-st.subheader("🍉 Tren Keterlibatan Seiring Waktu")
-engagement_trend_data = filtered_df.groupby(filtered_df['Date'].dt.date)['Engagements'].sum().reset_index()
-fig_trend = px.line(
-    engagement_trend_data,
-    x='Date',
-    y='Engagements',
-    markers=True
-)
-fig_trend.update_traces(line=dict(color='#FF6347', width=3))
-st.plotly_chart(fig_trend, use_container_width=True)
+    col1, col2 = st.columns(2)
+
+    with col1:
+        # Kombinasi Jenis Media
+        st.subheader("🥝 Kombinasi Jenis Media")
+        media_type_data = aggs['media_type']
+        if media_type_data is not None:
+            st.plotly_chart(go.Figure(media_type_figure(media_type_data)), use_container_width=True)
+        else:
+            st.info("Kolom 'Media Type' tidak ditemukan di data.")
+
+    with col2:
+        # 5 Lokasi Teratas
+        st.subheader("🍍 5 Lokasi Teratas")
+        st.plotly_chart(go.Figure(location_figure(aggs['location'])), use_container_width=True)
+
+    # Tren Keterlibatan Seiring Waktu
+    st.subheader("🍉 Tren Keterlibatan Seiring Waktu")
+    st.plotly_chart(go.Figure(trend_figure(aggs['trend'])), use_container_width=True)
+
+
+advanced_charts_fragment(aggs)
 
 # Menampilkan data mentah yang difilter
-if st.checkbox("Tampilkan data mentah yang difilter"):
-    st.dataframe(filtered_df)
+@st.fragment
+def raw_data_fragment(filtered_df):
+    """
+    Checkbox data mentah sebagai fragment agar mencentangnya tidak menggambar ulang semua grafik.
+    """
+    if st.checkbox("Tampilkan data mentah yang difilter"):
+        st.dataframe(filtered_df.drop(columns='DateDay'))
+
+
+raw_data_fragment(filtered_df)